@@ -1,16 +1,70 @@
 # app.py
 
-from flask import Flask, render_template, request, redirect, url_for, session
+from flask import Flask, render_template, request, redirect, url_for, session, jsonify, send_from_directory, g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
-from datetime import datetime
+from flask_sqlalchemy.session import Session
+from sqlalchemy.exc import IntegrityError
+from datetime import datetime, timedelta
+from functools import wraps
+import calendar
+import os
+import sqlite3
+import threading
+import time
+
+from passwords import PasswordHasher, HasherBusy
+from ratelimit import RateLimiter, SQLiteBucketStore
+from photos import save_original, schedule_variants, pick_variant
 
 # --- Configuration ---
 app = Flask(__name__, template_folder='templates', static_folder='static')
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///campus.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///campus.db')
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Read replica for read-only routes; the local SQLite copy is refreshed with the backup API
+app.config['SQLALCHEMY_BINDS'] = {'replica': os.environ.get('REPLICA_DATABASE_URL', 'sqlite:///campus_replica.db')}
+app.config['REPLICA_REFRESH_SECONDS'] = 10
+app.config['REPLICA_AUTO_REFRESH'] = True  # Off = refresh only via the refresh-replica command (cron)
+app.config['REPLICA_MAX_LAG_SECONDS'] = 30  # Default freshness bound; routes can set their own
+app.config['READ_YOUR_WRITES_SECONDS'] = 15  # External replicas only: after a user's own POST, their reads go to the primary this long
 app.config['SECRET_KEY'] = 'your_super_secret_key_123' 
-
-db = SQLAlchemy(app)
+app.config['UPCOMING_WINDOW_DAYS'] = 30  # How far ahead recurring series are expanded on listings
+
+# Admission control for write routes: token buckets per user and per IP (rate = tokens/second).
+# Per-IP limits are much looser because many students share one campus NAT address.
+app.config['RATE_LIMITS'] = {
+    'login': {'per_user': {'rate': 0.2, 'burst': 5}, 'per_ip': {'rate': 20, 'burst': 200}},
+    'register_event_submit': {'per_user': {'rate': 0.5, 'burst': 5}, 'per_ip': {'rate': 20, 'burst': 200}},
+    'register_series_submit': {'per_user': {'rate': 0.5, 'burst': 5}, 'per_ip': {'rate': 20, 'burst': 200}},
+    'default': {'per_user': {'rate': 1, 'burst': 10}, 'per_ip': {'rate': 50, 'burst': 500}},
+}
+app.config['RATE_LIMIT_STORAGE'] = None  # Path to a SQLite file to share buckets across workers
+app.config['MAX_CONCURRENT_WRITES'] = 8  # Requests beyond this fail fast with 503
+app.config['RETRY_AFTER_SECONDS'] = 1
+
+# Password hashing: 'scrypt' (cost = N) or 'pbkdf2_sha256' (cost = iterations)
+app.config['PASSWORD_HASH_SCHEME'] = 'scrypt'
+app.config['PASSWORD_HASH_COST'] = 2 ** 14
+app.config['PASSWORD_HASH_WORKERS'] = 2  # Hashes running at once
+app.config['PASSWORD_HASH_MAX_PENDING'] = 32  # Logins allowed to wait for a worker before 503
+app.config['PASSWORD_HASH_USE_PROCESSES'] = False
+
+# Uploaded club photos and the widths of their resized variants
+app.config['PHOTO_UPLOAD_FOLDER'] = os.path.join(app.instance_path, 'club_photos')
+app.config['PHOTO_VARIANT_WIDTHS'] = {'thumb': 160, 'card': 480, 'hero': 1280}
+app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024
+
+# Club notifications for digest-mode users are coalesced per club for this long
+app.config['DIGEST_WINDOW_MINUTES'] = 60
+
+class RoutingSession(Session):
+    """Sends all queries to the replica while a @read_replica route has chosen it."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and has_app_context() and g.get('use_replica'):
+            return self._db.engines['replica']
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+db = SQLAlchemy(app, session_options={'class_': RoutingSession})
 
 # =================================================================
 # --- Database Models (Tables) ---
@@ -19,8 +73,9 @@ db = SQLAlchemy(app)
 class User(db.Model):
     user_id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(80), unique=True, nullable=False)
-    password_hash = db.Column(db.String(120), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), nullable=False)
+    notification_mode = db.Column(db.String(10), nullable=False, default='digest') # 'immediate' or 'digest'
     enrollments = db.relationship('Enrollment', backref='student', lazy=True)
     
 class Club(db.Model):
@@ -30,6 +85,7 @@ class Club(db.Model):
     description = db.Column(db.Text, nullable=True)
     faculty_advisor = db.Column(db.String(100), nullable=True)
     photo_url = db.Column(db.String(200), nullable=True)
+    photo_file = db.Column(db.String(100), nullable=True) # Uploaded original, see photos.py
     past_events_summary = db.Column(db.Text, nullable=True)
     events = db.relationship('Event', backref='club', lazy=True)
     updates = db.relationship('Update', backref='club', lazy=True)
@@ -45,10 +101,32 @@ class Event(db.Model):
     event_id = db.Column(db.Integer, primary_key=True)
     club_id = db.Column(db.Integer, db.ForeignKey('club.club_id'), nullable=False)
     title = db.Column(db.String(100), nullable=False)
-    date_time = db.Column(db.DateTime, nullable=False)
+    date_time = db.Column(db.DateTime, nullable=False, index=True)
+    location = db.Column(db.String(100), nullable=True)
+    description = db.Column(db.Text, nullable=True)
+    registration_link = db.Column(db.String(200), nullable=True)
+    # Set when this row is a materialized occurrence of a recurring EventSeries
+    series_id = db.Column(db.Integer, db.ForeignKey('event_series.series_id'), nullable=True)
+    __table_args__ = (
+        db.Index('ix_event_club_date', 'club_id', 'date_time'),
+        db.Index('_series_occurrence_uc', 'series_id', 'date_time', unique=True),
+    )
+
+class EventSeries(db.Model):
+    # A recurring event (e.g. weekly meetings). Occurrences are expanded on read
+    # within a date window; an Event row is only created once someone registers.
+    series_id = db.Column(db.Integer, primary_key=True)
+    club_id = db.Column(db.Integer, db.ForeignKey('club.club_id'), nullable=False, index=True)
+    title = db.Column(db.String(100), nullable=False)
+    start_date_time = db.Column(db.DateTime, nullable=False)
+    until = db.Column(db.DateTime, nullable=True) # None = repeats indefinitely
+    frequency = db.Column(db.String(10), nullable=False, default='weekly') # 'daily', 'weekly' or 'monthly'
+    interval = db.Column(db.Integer, nullable=False, default=1)
     location = db.Column(db.String(100), nullable=True)
     description = db.Column(db.Text, nullable=True)
     registration_link = db.Column(db.String(200), nullable=True)
+    club = db.relationship('Club', backref='event_series', lazy=True)
+    occurrences = db.relationship('Event', backref='series', lazy=True)
 
 class Update(db.Model):
     update_id = db.Column(db.Integer, primary_key=True)
@@ -69,6 +147,13 @@ class Notification(db.Model):
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=db.func.now())
     is_read = db.Column(db.Boolean, default=False)
+    # Digest fields: a pending row collects a user's notifications for one club
+    # until flush_digests() delivers it after DIGEST_WINDOW_MINUTES
+    club_id = db.Column(db.Integer, db.ForeignKey('club.club_id'), nullable=True)
+    count = db.Column(db.Integer, nullable=False, default=1)
+    is_pending = db.Column(db.Boolean, nullable=False, default=False)
+    window_start = db.Column(db.DateTime, nullable=True)
+    __table_args__ = (db.Index('ix_notification_digest', 'club_id', 'is_pending', 'user_id'),)
 
 class EventRegistration(db.Model):
     registration_id = db.Column(db.Integer, primary_key=True)
@@ -104,6 +189,487 @@ def requires_coordinator_access(club_id):
     return True, Club.query.get_or_404(club_id)
 
 
+class EventOccurrence:
+    """A not-yet-materialized occurrence of an EventSeries, shaped like an Event for templates."""
+    event_id = None
+
+    def __init__(self, series, date_time):
+        self.series = series
+        self.series_id = series.series_id
+        self.club_id = series.club_id
+        self.club = series.club
+        self.title = series.title
+        self.date_time = date_time
+        self.location = series.location
+        self.description = series.description
+        self.registration_link = series.registration_link
+
+
+def _add_months(dt, months):
+    month_index = dt.month - 1 + months
+    year = dt.year + month_index // 12
+    month = month_index % 12 + 1
+    day = min(dt.day, calendar.monthrange(year, month)[1])
+    return dt.replace(year=year, month=month, day=day)
+
+
+def expand_series(series, start, end):
+    """Yields the occurrence datetimes of a series that fall within [start, end).
+
+    `until` is inclusive: an occurrence at exactly that time is the last one.
+    """
+    interval = max(series.interval or 1, 1)
+    current = series.start_date_time
+
+    def in_series(dt):
+        return dt < end and (series.until is None or dt <= series.until)
+
+    if series.frequency == 'monthly':
+        # Jump to about a month before the window instead of walking every past month
+        months_before = (start.year - current.year) * 12 + start.month - current.month - 1
+        count = max(months_before, 0) // interval * interval
+        current = _add_months(series.start_date_time, count)
+        while in_series(current):
+            if current >= start:
+                yield current
+            count += interval
+            current = _add_months(series.start_date_time, count)
+        return
+
+    step = timedelta(days=interval) if series.frequency == 'daily' else timedelta(weeks=interval)
+    if current < start:
+        # Jump straight to the window instead of walking every past occurrence
+        current += step * ((start - current) // step)
+        if current < start:
+            current += step
+    while in_series(current):
+        yield current
+        current += step
+
+
+def events_in_range(start, end, club_id=None):
+    """Returns one-off events and expanded series occurrences in [start, end), soonest first.
+
+    The Event query is a range scan on the date_time index, so it only touches
+    rows inside the window no matter how many past events have piled up.
+    """
+    event_query = Event.query.filter(Event.date_time >= start, Event.date_time < end)
+    series_query = EventSeries.query.filter(
+        EventSeries.start_date_time < end,
+        db.or_(EventSeries.until.is_(None), EventSeries.until >= start)
+    )
+    if club_id is not None:
+        event_query = event_query.filter(Event.club_id == club_id)
+        series_query = series_query.filter(EventSeries.club_id == club_id)
+
+    events = event_query.join(Club).order_by(Event.date_time.asc()).all()
+    materialized = {(e.series_id, e.date_time) for e in events if e.series_id}
+
+    for series in series_query.all():
+        for occurrence_time in expand_series(series, start, end):
+            if (series.series_id, occurrence_time) not in materialized:
+                events.append(EventOccurrence(series, occurrence_time))
+
+    events.sort(key=lambda e: e.date_time)
+    return events
+
+
+def upcoming_events(club_id=None, days=None):
+    """Default listing: everything from now until the configured window, past events excluded."""
+    now = datetime.now()
+    days = days or app.config['UPCOMING_WINDOW_DAYS']
+    return events_in_range(now, now + timedelta(days=days), club_id=club_id)
+
+
+def is_occurrence(series, date_time):
+    return date_time in expand_series(series, date_time, date_time + timedelta(seconds=1))
+
+
+def materialize_occurrence(series, date_time):
+    """Gets or creates the Event row for one occurrence of a series (e.g. to register for it)."""
+    event = Event.query.filter_by(series_id=series.series_id, date_time=date_time).first()
+    if event:
+        return event
+
+    if not is_occurrence(series, date_time):
+        return None
+
+    event = Event(
+        club_id=series.club_id, series_id=series.series_id, title=series.title,
+        date_time=date_time, location=series.location, description=series.description,
+        registration_link=series.registration_link
+    )
+    db.session.add(event)
+    try:
+        db.session.commit()
+    except IntegrityError:
+        # Another request materialized the same occurrence first; use its row
+        db.session.rollback()
+        event = Event.query.filter_by(series_id=series.series_id, date_time=date_time).first()
+    return event
+
+
+def get_rate_limiter():
+    """Builds the RateLimiter from config on first use."""
+    limiter = app.extensions.get('rate_limiter')
+    if limiter is None:
+        storage = app.config['RATE_LIMIT_STORAGE']
+        limiter = RateLimiter(
+            app.config['RATE_LIMITS'],
+            store=SQLiteBucketStore(storage) if storage else None,
+            max_in_flight=app.config['MAX_CONCURRENT_WRITES'],
+            retry_after=app.config['RETRY_AFTER_SECONDS']
+        )
+        app.extensions['rate_limiter'] = limiter
+    return limiter
+
+
+def save_club_photo_upload(club):
+    """Stores an uploaded 'photo' file for the club and queues its resized variants."""
+    photo = request.files.get('photo')
+    if not photo or not photo.filename:
+        return
+    folder = app.config['PHOTO_UPLOAD_FOLDER']
+    club.photo_file = save_original(photo, folder)
+    schedule_variants(club.photo_file, folder, app.config['PHOTO_VARIANT_WIDTHS'].values())
+
+
+@app.template_global()
+def club_photo_url(club, size='card'):
+    """URL of the smallest stored variant that fits `size` ('thumb', 'card' or 'hero')."""
+    if not club.photo_file:
+        return club.photo_url
+    widths = app.config['PHOTO_VARIANT_WIDTHS']
+    filename = pick_variant(club.photo_file, app.config['PHOTO_UPLOAD_FOLDER'], widths.values(), widths[size])
+    return url_for('club_photo', filename=filename)
+
+
+def notify(user_ids, club, message, now=None):
+    """Sends a club notification to each user, honouring their delivery preference.
+
+    Immediate users get a row each. Digest users share one pending row per
+    club that is updated in place, so a burst of changes costs one row per user.
+    Only for club-wide news: personal notices (acceptance, rejection, dismissal)
+    are written directly so they are never delayed or folded into a digest.
+    Does not commit; the caller's transaction does.
+    """
+    user_ids = list(user_ids)
+    if not user_ids:
+        return
+    now = now or datetime.now()
+
+    modes = dict(db.session.query(User.user_id, User.notification_mode).filter(User.user_id.in_(user_ids)))
+    digest_ids = [uid for uid in user_ids if modes.get(uid) == 'digest']
+    pending = {
+        n.user_id: n for n in Notification.query.filter(
+            Notification.club_id == club.club_id,
+            Notification.is_pending.is_(True),
+            Notification.user_id.in_(digest_ids)
+        )
+    } if digest_ids else {}
+
+    new_rows = []
+    for uid in user_ids:
+        if uid in pending:
+            digest = pending[uid]
+            digest.count += 1
+            digest.message = message
+            digest.timestamp = now
+        elif uid in modes:
+            is_digest = modes[uid] == 'digest'
+            new_rows.append(Notification(
+                user_id=uid, club_id=club.club_id, message=message, timestamp=now,
+                is_pending=is_digest, window_start=now if is_digest else None
+            ))
+    db.session.add_all(new_rows)
+
+
+def notify_club_members(club, message, now=None):
+    member_ids = [row.student_id for row in db.session.query(Enrollment.student_id).filter_by(
+        club_id=club.club_id, status='Member'
+    )]
+    notify(member_ids, club, message, now=now)
+
+
+def deliver_digest(digest, club_name, now):
+    """Turns a pending digest into a delivered notification (shared with async_app)."""
+    if digest.count > 1:
+        digest.message = f"{digest.count} new updates from {club_name}. Latest: {digest.message}"
+    digest.is_pending = False
+    digest.timestamp = now
+
+
+def flush_digests(now=None, user_id=None):
+    """Delivers pending digests whose window has closed (all users, or just `user_id`).
+
+    Returns how many were delivered.
+    """
+    now = now or datetime.now()
+    cutoff = now - timedelta(minutes=app.config['DIGEST_WINDOW_MINUTES'])
+    due_query = Notification.query.filter(
+        Notification.is_pending.is_(True), Notification.window_start <= cutoff
+    )
+    if user_id is not None:
+        due_query = due_query.filter(Notification.user_id == user_id)
+    due = due_query.join(Club, Notification.club_id == Club.club_id).add_entity(Club).all()
+    if not due:
+        return 0
+
+    for digest, club in due:
+        deliver_digest(digest, club.name, now)
+    db.session.commit()
+    return len(due)
+
+
+def get_password_hasher():
+    """Builds the PasswordHasher (and its worker pool) from config on first use."""
+    hasher = app.extensions.get('password_hasher')
+    if hasher is None:
+        hasher = PasswordHasher(
+            scheme=app.config['PASSWORD_HASH_SCHEME'],
+            cost=app.config['PASSWORD_HASH_COST'],
+            workers=app.config['PASSWORD_HASH_WORKERS'],
+            max_pending=app.config['PASSWORD_HASH_MAX_PENDING'],
+            use_processes=app.config['PASSWORD_HASH_USE_PROCESSES']
+        )
+        hasher.dummy_hash  # Computed up front so the first unknown-user login isn't slower
+        app.extensions['password_hasher'] = hasher
+    return hasher
+
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+_replica_state = {'thread': None, 'lock': threading.Lock()}
+
+
+def _sqlite_path(engine):
+    return engine.url.database if engine.url.get_backend_name() == 'sqlite' else None
+
+
+def _lock_file(lock_file, blocking):
+    """Takes an exclusive lock on an open file; returns False if `blocking` is off and it is held."""
+    try:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+        else:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def refresh_replica(source=None, last_version=None):
+    """Copies the primary into the local SQLite replica with the online backup API.
+
+    If `source` (a long-lived connection to the primary) is given and its
+    PRAGMA data_version still equals `last_version`, nothing was committed since
+    the last copy, so the copy is skipped. Either way the replica's
+    '.snapshot' marker is touched; its mtime is the freshness every worker
+    reads. Returns the data_version that was copied.
+    """
+    primary_path = _sqlite_path(db.engines[None])
+    replica_path = _sqlite_path(db.engines['replica'])
+    if not primary_path or not replica_path:
+        return None
+
+    snapshot_at = time.time()
+    own_source = source is None
+    if own_source:
+        source = sqlite3.connect(primary_path)
+    try:
+        version = source.execute('PRAGMA data_version').fetchone()[0]
+        if own_source or version != last_version:
+            # One copy at a time across processes (background refresher vs the CLI command)
+            with open(replica_path + '.copy.lock', 'a+') as copy_lock:
+                _lock_file(copy_lock, blocking=True)
+                target = sqlite3.connect(replica_path)
+                try:
+                    source.backup(target)
+                finally:
+                    target.close()
+    finally:
+        if own_source:
+            source.close()
+
+    marker = replica_path + '.snapshot'
+    open(marker, 'a').close()
+    os.utime(marker, (snapshot_at, snapshot_at))
+    return version
+
+
+def replica_snapshot_at():
+    """Wall-clock time at which the replica last matched the primary; None if never refreshed."""
+    try:
+        return os.path.getmtime(_sqlite_path(db.engines['replica']) + '.snapshot')
+    except OSError:
+        return None
+
+
+def replica_lag():
+    """Seconds since the replica was last known to match the primary; None if never refreshed."""
+    if not _sqlite_path(db.engines['replica']):
+        return 0  # An external replica; its replication lag is managed outside the app
+    snapshot_at = replica_snapshot_at()
+    return None if snapshot_at is None else time.time() - snapshot_at
+
+
+def start_replica_refresher():
+    """Starts this process's refresher thread (once) if REPLICA_AUTO_REFRESH is on.
+
+    Every worker starts one, but only the worker holding the '.refresher.lock'
+    file lock copies; the others just retry the lock in case that worker exits.
+    With REPLICA_AUTO_REFRESH off, run the refresh-replica command from cron instead.
+    """
+    if not app.config['REPLICA_AUTO_REFRESH'] or not _sqlite_path(db.engines['replica']):
+        return
+    with _replica_state['lock']:
+        if _replica_state['thread'] is not None:
+            return
+        replica_path = _sqlite_path(db.engines['replica'])
+        primary_path = _sqlite_path(db.engines[None])
+
+        def run():
+            with open(replica_path + '.refresher.lock', 'a+') as election_lock:
+                while not _lock_file(election_lock, blocking=False):
+                    time.sleep(app.config['REPLICA_REFRESH_SECONDS'])
+
+                source = sqlite3.connect(primary_path)
+                version = None
+                while True:
+                    try:
+                        with app.app_context():
+                            version = refresh_replica(source, version)
+                    except Exception as e:
+                        app.logger.warning("Replica refresh failed: %s", e)
+                    time.sleep(app.config['REPLICA_REFRESH_SECONDS'])
+
+        _replica_state['thread'] = threading.Thread(target=run, name='replica-refresher', daemon=True)
+        _replica_state['thread'].start()
+
+
+def read_replica(max_lag=None):
+    """Serves a read-only route from the replica when it is fresh enough.
+
+    Falls back to the primary when the replica is older than `max_lag` seconds,
+    or when its snapshot was taken before this user's last POST, so users always
+    see their own writes. An external replica has no snapshot time, so there the
+    user's reads stay on the primary for READ_YOUR_WRITES_SECONDS instead.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            start_replica_refresher()
+            last_write_at = session.get('last_write_at', 0)
+            if _sqlite_path(db.engines['replica']):
+                snapshot_at = replica_snapshot_at()
+                lag = None if snapshot_at is None else time.time() - snapshot_at
+                has_own_writes = snapshot_at is not None and snapshot_at > last_write_at
+            else:
+                lag = replica_lag()
+                has_own_writes = time.time() - last_write_at > app.config['READ_YOUR_WRITES_SECONDS']
+            g.use_replica = (
+                lag is not None
+                and lag <= (max_lag if max_lag is not None else app.config['REPLICA_MAX_LAG_SECONDS'])
+                and has_own_writes
+            )
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Schema added since campus.db was first created. db.create_all() only creates missing
+# tables, so migrate_db() adds these to an existing database in place, keeping its data.
+SCHEMA_COLUMNS = [
+    ('event', 'series_id', 'INTEGER REFERENCES event_series (series_id)'),
+    ('club', 'photo_file', 'VARCHAR(100)'),
+    ('user', 'notification_mode', "VARCHAR(10) NOT NULL DEFAULT 'digest'"),
+    ('notification', 'club_id', 'INTEGER REFERENCES club (club_id)'),
+    ('notification', 'count', 'INTEGER NOT NULL DEFAULT 1'),
+    ('notification', 'is_pending', 'BOOLEAN NOT NULL DEFAULT 0'),
+    ('notification', 'window_start', 'DATETIME'),
+]
+SCHEMA_INDEXES = [
+    'CREATE INDEX IF NOT EXISTS ix_event_date_time ON event (date_time)',
+    'CREATE INDEX IF NOT EXISTS ix_event_club_date ON event (club_id, date_time)',
+    'CREATE UNIQUE INDEX IF NOT EXISTS _series_occurrence_uc ON event (series_id, date_time)',
+    'CREATE INDEX IF NOT EXISTS ix_notification_digest ON notification (club_id, is_pending, user_id)',
+]
+_schema_state = {'migrated': False, 'lock': threading.Lock()}
+
+
+def migrate_db():
+    """Brings an existing database up to the current models. Safe to run repeatedly."""
+    db.create_all()
+    inspector = db.inspect(db.engine)
+    added = False
+    with db.engine.begin() as conn:
+        for table, column, ddl in SCHEMA_COLUMNS:
+            if column not in {c['name'] for c in inspector.get_columns(table)}:
+                conn.execute(db.text(f'ALTER TABLE "{table}" ADD COLUMN {column} {ddl}'))
+                added = True
+        for statement in SCHEMA_INDEXES:
+            conn.execute(db.text(statement))
+
+    replica_path = _sqlite_path(db.engines['replica'])
+    if added and replica_path and os.path.exists(replica_path + '.snapshot'):
+        # The replica still has the old schema; read from the primary until it is refreshed
+        os.remove(replica_path + '.snapshot')
+
+
+@app.before_request
+def ensure_schema():
+    if _schema_state['migrated']:
+        return
+    with _schema_state['lock']:
+        if not _schema_state['migrated']:
+            migrate_db()
+            _schema_state['migrated'] = True
+
+
+@app.after_request
+def remember_last_write(response):
+    if request.method == 'POST' and 'user_id' in session:
+        session['last_write_at'] = time.time()
+    return response
+
+
+def admission_control(view):
+    """Sheds bursts on a write route before it touches the database.
+
+    Over-limit clients get 429 and a full server gets 503, both with Retry-After.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        limiter = get_rate_limiter()
+        endpoint = request.endpoint
+
+        if request.method == 'POST':
+            # Login attempts are keyed on the attempted username from this address, so guessing
+            # one account's password is capped but an attacker elsewhere cannot lock its owner out
+            if endpoint == 'login':
+                username = request.form.get('username')
+                user_key = f"{username}@{request.remote_addr}" if username else None
+            else:
+                user_key = session.get('user_id')
+            retry_after = limiter.check(endpoint, user_key=user_key or None, ip_key=request.remote_addr)
+            if retry_after:
+                return "Too many requests. Please try again shortly.", 429, {'Retry-After': str(retry_after)}
+
+        if not limiter.concurrency.try_acquire():
+            limiter.record(endpoint, 'overloaded')
+            return "Server is busy. Please try again shortly.", 503, {'Retry-After': str(limiter.retry_after)}
+        try:
+            limiter.record(endpoint, 'admitted')
+            return view(*args, **kwargs)
+        finally:
+            limiter.concurrency.release()
+    return wrapper
+
+
 # =================================================================
 # --- Authentication & Core Routes ---
 # =================================================================
@@ -115,12 +681,30 @@ def index():
     return render_template('index.html', error=request.args.get('error'))
 
 @app.route('/login', methods=['POST'])
+@admission_control
 def login():
     username = request.form.get('username')
     password = request.form.get('password')
     user = User.query.filter_by(username=username).first()
+    hasher = get_password_hasher()
+
+    try:
+        # Unknown usernames are checked against a dummy hash so they take as long as known ones
+        stored_hash = user.password_hash if user else hasher.dummy_hash
+        valid = hasher.verify(stored_hash, password or '') and user is not None and bool(password)
+    except HasherBusy:
+        return "Server is busy. Please try again shortly.", 503, {'Retry-After': str(app.config['RETRY_AFTER_SECONDS'])}
+
+    if valid and hasher.needs_rehash(user.password_hash):
+        # Upgrade legacy plaintext or weaker hashes now that we know the password.
+        # If the pool is busy, skip it; a later login will do the upgrade.
+        try:
+            user.password_hash = hasher.hash(password)
+            db.session.commit()
+        except HasherBusy:
+            pass
 
-    if user and user.password_hash == password: 
+    if valid:
         session['user_id'] = user.user_id
         session['role'] = user.role
         return redirect(url_for('dashboard'))
@@ -134,7 +718,23 @@ def logout():
     return redirect(url_for('index'))
 
 
+@app.route('/notifications/preferences', methods=['POST'])
+def notification_preferences():
+    if 'user_id' not in session:
+        return redirect(url_for('index'))
+
+    mode = request.form.get('notification_mode')
+    if mode not in ('immediate', 'digest'):
+        return redirect(url_for('dashboard', message="Invalid notification preference.", status='error'))
+
+    user = User.query.get_or_404(session['user_id'])
+    user.notification_mode = mode
+    db.session.commit()
+    return redirect(url_for('dashboard', message=f"Club notifications will be delivered as: {mode}.", status='success'))
+
+
 @app.route('/dashboard')
+@read_replica(max_lag=30)
 def dashboard():
     if 'user_id' not in session:
         return redirect(url_for('index'))
@@ -143,10 +743,18 @@ def dashboard():
     user_id = session['user_id']
     
     if role == 'Student':
+        # Deliver this student's due digests now rather than waiting for the flush-digests job.
+        # That is a write, so it and the reads that follow use the primary.
+        use_replica, g.use_replica = g.get('use_replica'), False
+        if not flush_digests(user_id=user_id):
+            g.use_replica = use_replica
+
         clubs = Club.query.all()
-        events = Event.query.join(Club).order_by(Event.date_time.desc()).all()
+        events = upcoming_events()
         club_updates = Update.query.join(Club).order_by(Update.timestamp.desc()).all()
-        personal_notifications = Notification.query.filter_by(user_id=user_id).order_by(Notification.timestamp.desc()).all()
+        personal_notifications = Notification.query.filter_by(
+            user_id=user_id, is_pending=False
+        ).order_by(Notification.timestamp.desc()).all()
         
         my_enrollments = Enrollment.query.filter_by(student_id=user_id).join(Club).all()
         
@@ -178,11 +786,95 @@ def dashboard():
 
     return redirect(url_for('index'))
 
+@app.route('/media/clubs/<path:filename>')
+def club_photo(filename):
+    # Filenames are content hashes, so a given URL never changes content
+    response = send_from_directory(app.config['PHOTO_UPLOAD_FOLDER'], filename, max_age=31536000)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
 # =================================================================
 # --- Student Functionality ---
 # =================================================================
 
+@app.route('/events/upcoming')
+@read_replica(max_lag=60)
+def events_upcoming():
+    if 'user_id' not in session:
+        return redirect(url_for('index'))
+
+    days = request.args.get('days', 7, type=int)
+    if days not in (7, 30):
+        days = 7
+    club_id = request.args.get('club_id', type=int)
+
+    events = upcoming_events(club_id=club_id, days=days)
+    return render_template('event_list.html', events=events, days=days, club_id=club_id)
+
+@app.route('/events/month/<int:year>/<int:month>')
+@read_replica(max_lag=300)
+def events_by_month(year, month):
+    if 'user_id' not in session:
+        return redirect(url_for('index'))
+    if not 1 <= month <= 12 or not datetime.min.year <= year < datetime.max.year:
+        return redirect(url_for('events_upcoming'))
+
+    club_id = request.args.get('club_id', type=int)
+    start = datetime(year, month, 1)
+    end = _add_months(start, 1)
+
+    events = events_in_range(start, end, club_id=club_id)
+    return render_template('event_list.html', events=events, year=year, month=month, club_id=club_id)
+
+@app.route('/event/series/<int:series_id>/<occurrence>')
+def series_occurrence(series_id, occurrence):
+    if 'role' not in session or session['role'] != 'Student':
+        return redirect(url_for('index'))
+
+    series = EventSeries.query.get_or_404(series_id)
+    try:
+        date_time_obj = datetime.strptime(occurrence, '%Y-%m-%dT%H:%M')
+    except ValueError:
+        return redirect(url_for('dashboard', message="Invalid event occurrence.", status='error'))
+
+    if not is_occurrence(series, date_time_obj):
+        return redirect(url_for('dashboard', message="That event does not take place at this time.", status='error'))
+
+    event = Event.query.filter_by(series_id=series_id, date_time=date_time_obj).first()
+    if event:
+        return redirect(url_for('register_event_form', event_id=event.event_id))
+
+    # Not materialized yet: show the form, and create the Event row only when it is submitted
+    return render_template(
+        'event_register.html',
+        event=EventOccurrence(series, date_time_obj),
+        current_user=User.query.get(session['user_id']),
+        error_message=None,
+        submit_url=url_for('register_series_submit', series_id=series_id, occurrence=occurrence)
+    )
+
+@app.route('/register/series/submit/<int:series_id>/<occurrence>', methods=['POST'])
+@admission_control
+def register_series_submit(series_id, occurrence):
+    if 'role' not in session or session['role'] != 'Student':
+        return redirect(url_for('index'))
+
+    series = EventSeries.query.get_or_404(series_id)
+    try:
+        date_time_obj = datetime.strptime(occurrence, '%Y-%m-%dT%H:%M')
+    except ValueError:
+        return redirect(url_for('dashboard', message="Invalid event occurrence.", status='error'))
+
+    event = materialize_occurrence(series, date_time_obj)
+    if not event:
+        return redirect(url_for('dashboard', message="That event does not take place at this time.", status='error'))
+
+    return submit_event_registration(event)
+
+
 @app.route('/club/<int:club_id>')
+@read_replica(max_lag=60)
 def club_detail(club_id):
     if 'role' not in session or session['role'] != 'Student':
         return redirect(url_for('index'))
@@ -210,6 +902,7 @@ def club_detail(club_id):
     )
 
 @app.route('/club/<int:club_id>/join', methods=['POST'])
+@admission_control
 def join_club(club_id):
     if 'role' not in session or session['role'] != 'Student':
         return redirect(url_for('index'))
@@ -263,15 +956,20 @@ def register_event_form(event_id):
     )
 
 @app.route('/register/event/submit/<int:event_id>', methods=['POST'])
+@admission_control
 def register_event_submit(event_id):
     if 'role' not in session or session['role'] != 'Student':
         return redirect(url_for('index'))
     
     event = Event.query.get_or_404(event_id)
+    return submit_event_registration(event)
+
+def submit_event_registration(event):
+    """Registers the logged-in student for the event from the submitted form."""
     student_id = session['user_id']
     
     existing_reg = EventRegistration.query.filter_by(
-        event_id=event_id, 
+        event_id=event.event_id, 
         student_id=student_id
     ).first()
     
@@ -287,7 +985,7 @@ def register_event_submit(event_id):
             student_major = request.form.get('student_major')
             
             new_reg = EventRegistration(
-                event_id=event_id, 
+                event_id=event.event_id, 
                 student_id=student_id,
                 student_roll_number=roll_number, 
                 contact_email=contact_email,    
@@ -336,7 +1034,9 @@ def add_club():
         if Club.query.filter_by(name=club_name).first():
             raise ValueError(f"Club name '{club_name}' already exists.")
 
-        new_coord_user = User(username=coord_username, password_hash=coord_password, role='Coordinator')
+        new_coord_user = User(
+            username=coord_username, password_hash=get_password_hasher().hash(coord_password), role='Coordinator'
+        )
         db.session.add(new_coord_user)
         db.session.flush() 
         
@@ -384,6 +1084,7 @@ def admin_edit_club(club_id):
             club.faculty_advisor = request.form['faculty_advisor']
             club.past_events_summary = request.form['past_events_summary']
             club.photo_url = request.form['photo_url']
+            save_club_photo_upload(club)
             
             db.session.commit()
             message = "Club details updated successfully by Admin!"
@@ -405,9 +1106,11 @@ def delete_club(club_id):
     
     try:
         Event.query.filter_by(club_id=club_id).delete()
+        EventSeries.query.filter_by(club_id=club_id).delete()
         Update.query.filter_by(club_id=club_id).delete()
         Enrollment.query.filter_by(club_id=club_id).delete()
         Coordinator.query.filter_by(club_id=club_id).delete()
+        Notification.query.filter_by(club_id=club_id, is_pending=True).delete()
         
         db.session.delete(club)
         db.session.commit()
@@ -422,7 +1125,15 @@ def delete_club(club_id):
 
     return redirect(url_for('dashboard', message=message, status=status))
 
+@app.route('/admin/rate_limits')
+def rate_limit_stats():
+    if 'role' not in session or session['role'] != 'Admin':
+        return redirect(url_for('index'))
+
+    return jsonify(get_rate_limiter().stats())
+
 @app.route('/admin/manage_users')
+@read_replica(max_lag=60)
 def manage_users():
     if 'role' not in session or session['role'] != 'Admin':
         return redirect(url_for('index'))
@@ -448,7 +1159,7 @@ def add_user():
         if User.query.filter_by(username=username).first():
             raise ValueError(f"Username '{username}' already exists.")
 
-        new_user = User(username=username, password_hash=password, role=user_role)
+        new_user = User(username=username, password_hash=get_password_hasher().hash(password), role=user_role)
         db.session.add(new_user)
         db.session.commit()
         
@@ -517,6 +1228,7 @@ def edit_club(club_id):
             club.faculty_advisor = request.form['faculty_advisor']
             club.past_events_summary = request.form['past_events_summary']
             club.photo_url = request.form['photo_url']
+            save_club_photo_upload(club)
             
             db.session.commit()
             message = "Club details updated successfully!"
@@ -529,17 +1241,32 @@ def edit_club(club_id):
     return render_template('edit_club.html', club=club, message=message, status=status) 
 
 @app.route('/coord/manage_events/<int:club_id>')
+@read_replica(max_lag=30)
 def manage_events(club_id):
     if 'role' not in session or session['role'] != 'Coordinator':
         return redirect(url_for('index'))
 
     club = Club.query.get_or_404(club_id)
-    events = Event.query.filter_by(club_id=club_id).order_by(Event.date_time.asc()).all()
+    show_past = request.args.get('show') == 'past'
+    now = datetime.now()
+
+    if show_past:
+        events = Event.query.filter(
+            Event.club_id == club_id, Event.date_time < now
+        ).order_by(Event.date_time.desc()).all()
+    else:
+        events = Event.query.filter(
+            Event.club_id == club_id, Event.date_time >= now, Event.series_id.is_(None)
+        ).order_by(Event.date_time.asc()).all()
+    series = EventSeries.query.filter_by(club_id=club_id).order_by(EventSeries.start_date_time.asc()).all()
     
     message = request.args.get('message')
     status = request.args.get('status')
     
-    return render_template('manage_events.html', club=club, events=events, message=message, status=status)
+    return render_template(
+        'manage_events.html', club=club, events=events, series=series,
+        show_past=show_past, message=message, status=status
+    )
 
 
 @app.route('/coord/add_event/<int:club_id>', methods=['POST'])
@@ -565,6 +1292,7 @@ def add_event(club_id):
             description=description, registration_link=registration_link
         )
         db.session.add(new_event)
+        notify_club_members(club, f"{club.name} scheduled '{title}' on {date_time_obj.strftime('%Y-%m-%d %H:%M')}.")
         db.session.commit()
         
         message = f"Event '{title}' created successfully!"
@@ -581,6 +1309,50 @@ def add_event(club_id):
     return redirect(url_for('manage_events', club_id=club_id, message=message, status=status))
 
 
+@app.route('/coord/add_event_series/<int:club_id>', methods=['POST'])
+def add_event_series(club_id):
+    if 'role' not in session or session['role'] != 'Coordinator':
+        return redirect(url_for('index'))
+        
+    club = Club.query.get_or_404(club_id)
+    message = None
+    status = None
+    
+    try:
+        title = request.form['title']
+        frequency = request.form.get('frequency', 'weekly')
+        interval = int(request.form.get('interval') or 1)
+        if frequency not in ('daily', 'weekly', 'monthly') or interval < 1:
+            raise ValueError("Error: Frequency must be daily, weekly or monthly with a positive interval.")
+
+        start_date_time = datetime.strptime(request.form['start_date_time'], '%Y-%m-%d %H:%M')
+        until_str = request.form.get('until')
+        until = datetime.strptime(until_str, '%Y-%m-%d %H:%M') if until_str else None
+        
+        new_series = EventSeries(
+            club_id=club_id, title=title, start_date_time=start_date_time, until=until,
+            frequency=frequency, interval=interval, location=request.form.get('location'),
+            description=request.form.get('description'),
+            registration_link=request.form.get('registration_link')
+        )
+        db.session.add(new_series)
+        notify_club_members(club, f"{club.name} added the recurring event '{title}' ({frequency}).")
+        db.session.commit()
+        
+        message = f"Recurring event '{title}' created successfully!"
+        status = 'success'
+    except ValueError as e:
+        db.session.rollback()
+        message = str(e) if str(e).startswith('Error') else "Error: Invalid Date/Time format. Use YYYY-MM-DD HH:MM."
+        status = 'error'
+    except Exception as e:
+        db.session.rollback()
+        message = f"An error occurred: {e}"
+        status = 'error'
+
+    return redirect(url_for('manage_events', club_id=club_id, message=message, status=status))
+
+
 @app.route('/coord/post_update/<int:club_id>', methods=['GET', 'POST'])
 def post_update(club_id):
     if 'role' not in session or session['role'] != 'Coordinator':
@@ -597,6 +1369,7 @@ def post_update(club_id):
                 club_id=club_id, message=message_content, timestamp=datetime.now()
             )
             db.session.add(new_update)
+            notify_club_members(club, f"{club.name}: {message_content}")
             db.session.commit()
             
             message = "Update successfully posted to the Student Dashboard!"
@@ -609,6 +1382,7 @@ def post_update(club_id):
     return render_template('post_update.html', club=club, message=message, status=status)
 
 @app.route('/coord/manage_members/<int:club_id>')
+@read_replica(max_lag=30)
 def manage_members(club_id):
     if 'role' not in session or session['role'] != 'Coordinator':
         return redirect(url_for('index'))
@@ -657,6 +1431,7 @@ def dismiss_member(enrollment_id):
 
 
 @app.route('/coord/applicants/<int:club_id>')
+@read_replica(max_lag=30)
 def review_applicants(club_id):
     if 'role' not in session or session['role'] != 'Coordinator':
         return redirect(url_for('index'))
@@ -689,6 +1464,8 @@ def update_applicant(enrollment_id):
     try:
         if action == 'enroll':
             enrollment.status = 'Member'
+            acceptance_message = f"Your application to join the {club.name} has been accepted!"
+            db.session.add(Notification(user_id=student_id, message=acceptance_message))
             message = f"Student {student_username} successfully enrolled in {club.name}!"
             status = 'success'
         elif action == 'reject':
@@ -708,6 +1485,7 @@ def update_applicant(enrollment_id):
     return redirect(url_for('review_applicants', club_id=club_id, message=message, status=status))
 
 @app.route('/coord/view_registrations/<int:event_id>')
+@read_replica(max_lag=300)
 def view_registrations(event_id):
     if 'role' not in session or session['role'] != 'Coordinator':
         return redirect(url_for('index'))
@@ -730,6 +1508,24 @@ def view_registrations(event_id):
 # =================================================================
 # --- Database Initialization Command (For Setup) ---
 # =================================================================
+@app.cli.command('flush-digests')
+def flush_digests_command():
+    """Delivers pending notification digests; run periodically (e.g. every few minutes from cron)."""
+    delivered = flush_digests()
+    print(f"Delivered {delivered} notification digest(s).")
+
+@app.cli.command('migrate-db')
+def migrate_db_command():
+    """Adds new tables, columns and indexes to an existing database without losing data."""
+    migrate_db()
+    print("Database schema is up to date.")
+
+@app.cli.command('refresh-replica')
+def refresh_replica_command():
+    """Copies the primary database into the local read replica."""
+    refresh_replica()
+    print("Replica refreshed.")
+
 @app.cli.command('init-db')
 def init_db():
     """Initializes the database and adds mock data, including 50 extra students."""
@@ -739,17 +1535,19 @@ def init_db():
     # --- Mock Data Insertion ---
     
     # 1. Base Users (Admin, Coordinator, Student1, Student2)
-    admin_user = User(username='admin', password_hash='123', role='Admin')
-    coord_user = User(username='coord', password_hash='123', role='Coordinator')
-    student_user1 = User(username='student1', password_hash='123', role='Student')
-    student_user2 = User(username='student2', password_hash='123', role='Student')
+    # All mock accounts share the password '123', so hash it once instead of 55 times
+    mock_hash = get_password_hasher().hash('123')
+    admin_user = User(username='admin', password_hash=mock_hash, role='Admin')
+    coord_user = User(username='coord', password_hash=mock_hash, role='Coordinator')
+    student_user1 = User(username='student1', password_hash=mock_hash, role='Student')
+    student_user2 = User(username='student2', password_hash=mock_hash, role='Student')
     
     users_to_add = [admin_user, coord_user, student_user1, student_user2]
 
     # NEW: Loop to add 50 extra student users (student3 to student53)
     for i in range(3, 54): # This range includes 3 and excludes 54 (giving us 51 total students)
         username = f'student{i}'
-        new_student = User(username=username, password_hash='123', role='Student')
+        new_student = User(username=username, password_hash=mock_hash, role='Student')
         users_to_add.append(new_student)
         
     db.session.add_all(users_to_add)
@@ -786,6 +1584,17 @@ def init_db():
     )
     db.session.add(event_1)
     
+    # 4b. Recurring weekly meeting
+    weekly_meeting = EventSeries(
+        club_id=tech_club.club_id,
+        title='Weekly Coding Session',
+        start_date_time=datetime(2025, 9, 5, 17, 0),
+        frequency='weekly',
+        location='Lab 3',
+        description='Bring your laptop and your current project.'
+    )
+    db.session.add(weekly_meeting)
+    
     # 5. Update
     update_1 = Update(
         club_id=tech_club.club_id, 
@@ -803,6 +1612,7 @@ def init_db():
     db.session.add(enroll_1)
     
     db.session.commit()
+    refresh_replica()
     print("Database initialized, tables created, and 53 user accounts inserted!")
 
 if __name__ == '__main__':
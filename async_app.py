@@ -0,0 +1,280 @@
+# async_app.py
+#
+# ASGI entry point. The hottest read endpoints are served as JSON by async
+# handlers on SQLAlchemy's asyncio extension (aiosqlite driver), so an idle or
+# slow client costs a coroutine instead of a worker thread. Every other path
+# falls through to the existing Flask app, which keeps running unchanged.
+#
+#   uvicorn async_app:asgi_app
+#
+#   GET /api/dashboard                       upcoming events, latest updates, notifications (Students)
+#   GET /api/club/<club_id>                  club detail and members (Students)
+#   GET /api/events/upcoming?days=7|30       upcoming events (optional club_id)
+#   GET /api/events/month/<year>/<month>     events in a month (optional club_id)
+#
+# Requires: sqlalchemy[asyncio], aiosqlite, asgiref, and an ASGI server such as uvicorn.
+
+import json
+import os
+import re
+from datetime import datetime, timedelta
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qs
+
+from asgiref.wsgi import WsgiToAsgi
+from itsdangerous import BadSignature
+from sqlalchemy import select, or_
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import (
+    app, db, expand_series, _add_months, deliver_digest, ensure_schema,
+    User, Club, Event, EventSeries, Update, Enrollment, Notification
+)
+
+
+def _async_database_url():
+    if os.environ.get('ASYNC_DATABASE_URL'):
+        return os.environ['ASYNC_DATABASE_URL']
+    with app.app_context():
+        url = db.engines[None].url
+    return url.set(drivername='sqlite+aiosqlite') if url.get_backend_name() == 'sqlite' else url
+
+
+engine = create_async_engine(_async_database_url())
+Session = async_sessionmaker(engine, expire_on_commit=False)
+flask_asgi = WsgiToAsgi(app)
+
+
+# =================================================================
+# --- Helpers ---
+# =================================================================
+
+def current_user(scope):
+    """Reads the user from the Flask session cookie, so both stacks share logins."""
+    headers = dict(scope['headers'])
+    cookie = SimpleCookie(headers.get(b'cookie', b'').decode('latin-1'))
+    morsel = cookie.get(app.config.get('SESSION_COOKIE_NAME', 'session'))
+    if morsel is None:
+        return None
+    serializer = app.session_interface.get_signing_serializer(app)
+    try:
+        data = serializer.loads(morsel.value, max_age=int(app.permanent_session_lifetime.total_seconds()))
+    except BadSignature:
+        return None
+    return data if 'user_id' in data else None
+
+
+def event_json(event, club_name):
+    return {
+        'event_id': event.event_id,
+        'series_id': event.series_id,
+        'club_id': event.club_id,
+        'club_name': club_name,
+        'title': event.title,
+        'date_time': event.date_time.isoformat(),
+        'location': event.location,
+        'description': event.description,
+        'registration_link': event.registration_link,
+    }
+
+
+def occurrence_json(series, date_time, club_name):
+    return {
+        'event_id': None,
+        'series_id': series.series_id,
+        'club_id': series.club_id,
+        'club_name': club_name,
+        'title': series.title,
+        'date_time': date_time.isoformat(),
+        'location': series.location,
+        'description': series.description,
+        'registration_link': series.registration_link,
+    }
+
+
+async def events_in_range(session, start, end, club_id=None):
+    """Async counterpart of app.events_in_range, returning JSON-ready dicts."""
+    event_query = select(Event, Club.name).join(Club).where(
+        Event.date_time >= start, Event.date_time < end
+    ).order_by(Event.date_time.asc())
+    series_query = select(EventSeries, Club.name).join(Club).where(
+        EventSeries.start_date_time < end,
+        or_(EventSeries.until.is_(None), EventSeries.until >= start)
+    )
+    if club_id is not None:
+        event_query = event_query.where(Event.club_id == club_id)
+        series_query = series_query.where(EventSeries.club_id == club_id)
+
+    events = []
+    materialized = set()
+    for event, club_name in (await session.execute(event_query)).all():
+        events.append(event_json(event, club_name))
+        if event.series_id:
+            materialized.add((event.series_id, event.date_time))
+
+    for series, club_name in (await session.execute(series_query)).all():
+        for occurrence_time in expand_series(series, start, end):
+            if (series.series_id, occurrence_time) not in materialized:
+                events.append(occurrence_json(series, occurrence_time, club_name))
+
+    events.sort(key=lambda e: e['date_time'])
+    return events
+
+
+async def flush_due_digests(session, user_id, now):
+    """Async counterpart of app.flush_digests for one user, so the dashboard shows due digests."""
+    cutoff = now - timedelta(minutes=app.config['DIGEST_WINDOW_MINUTES'])
+    due = (await session.execute(
+        select(Notification, Club.name).join(Club, Notification.club_id == Club.club_id).where(
+            Notification.user_id == user_id,
+            Notification.is_pending.is_(True),
+            Notification.window_start <= cutoff
+        )
+    )).all()
+    if due:
+        for digest, club_name in due:
+            deliver_digest(digest, club_name, now)
+        await session.commit()
+
+
+def _int_arg(query, name, default=None):
+    try:
+        return int(query[name][0])
+    except (KeyError, ValueError):
+        return default
+
+
+# =================================================================
+# --- Async Read Endpoints ---
+# =================================================================
+
+async def dashboard(user, query):
+    now = datetime.now()
+    async with Session() as session:
+        await flush_due_digests(session, user['user_id'], now)
+        events = await events_in_range(session, now, now + timedelta(days=app.config['UPCOMING_WINDOW_DAYS']))
+        updates = (await session.execute(
+            select(Update, Club.name).join(Club).order_by(Update.timestamp.desc()).limit(50)
+        )).all()
+        notifications = (await session.execute(
+            select(Notification).where(
+                Notification.user_id == user['user_id'], Notification.is_pending.is_(False)
+            ).order_by(Notification.timestamp.desc()).limit(50)
+        )).scalars().all()
+
+    return 200, {
+        'events': events,
+        'updates': [
+            {'club_id': u.club_id, 'club_name': name, 'message': u.message,
+             'timestamp': u.timestamp.isoformat() if u.timestamp else None}
+            for u, name in updates
+        ],
+        'notifications': [
+            {'message': n.message, 'count': n.count, 'is_read': n.is_read,
+             'timestamp': n.timestamp.isoformat() if n.timestamp else None}
+            for n in notifications
+        ],
+    }
+
+
+async def club_detail(user, query, club_id):
+    async with Session() as session:
+        club = await session.get(Club, club_id)
+        if club is None:
+            return 404, {'error': 'Club not found.'}
+        enrollment_status = (await session.execute(
+            select(Enrollment.status).where(
+                Enrollment.club_id == club_id, Enrollment.student_id == user['user_id']
+            )
+        )).scalar()
+        members = (await session.execute(
+            select(User.username).join(Enrollment, Enrollment.student_id == User.user_id).where(
+                Enrollment.club_id == club_id, Enrollment.status == 'Member'
+            ).order_by(User.username)
+        )).scalars().all()
+
+    return 200, {
+        'club_id': club.club_id,
+        'name': club.name,
+        'summary': club.summary,
+        'description': club.description,
+        'faculty_advisor': club.faculty_advisor,
+        'photo_url': club.photo_url,
+        'past_events_summary': club.past_events_summary,
+        'enrollment_status': enrollment_status or 'None',
+        'members': members,
+    }
+
+
+async def events_upcoming(user, query):
+    days = _int_arg(query, 'days', 7)
+    if days not in (7, 30):
+        days = 7
+    now = datetime.now()
+    async with Session() as session:
+        events = await events_in_range(session, now, now + timedelta(days=days), _int_arg(query, 'club_id'))
+    return 200, {'days': days, 'events': events}
+
+
+async def events_by_month(user, query, year, month):
+    if not 1 <= month <= 12 or not datetime.min.year <= year < datetime.max.year:
+        return 404, {'error': 'Invalid month.'}
+    start = datetime(year, month, 1)
+    async with Session() as session:
+        events = await events_in_range(session, start, _add_months(start, 1), _int_arg(query, 'club_id'))
+    return 200, {'year': year, 'month': month, 'events': events}
+
+
+# (path, handler, role required): the same access rules as the matching Flask views.
+# None means any logged-in user.
+ROUTES = [
+    (re.compile(r'^/api/dashboard$'), dashboard, 'Student'),
+    (re.compile(r'^/api/club/(\d+)$'), club_detail, 'Student'),
+    (re.compile(r'^/api/events/upcoming$'), events_upcoming, None),
+    (re.compile(r'^/api/events/month/(\d+)/(\d+)$'), events_by_month, None),
+]
+
+
+# =================================================================
+# --- ASGI Application ---
+# =================================================================
+
+async def send_json(send, status, payload):
+    body = json.dumps(payload).encode('utf-8')
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def asgi_app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # The async handlers bypass Flask's before_request, so migrate here
+                with app.app_context():
+                    ensure_schema()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        for pattern, handler, role in ROUTES:
+            match = pattern.match(scope['path'])
+            if match:
+                user = current_user(scope)
+                if user is None:
+                    return await send_json(send, 401, {'error': 'Login required.'})
+                if role is not None and user.get('role') != role:
+                    return await send_json(send, 403, {'error': f"Access Denied: Must be a {role}."})
+                query = parse_qs(scope['query_string'].decode('latin-1'))
+                status, payload = await handler(user, query, *(int(arg) for arg in match.groups()))
+                return await send_json(send, status, payload)
+
+    # Everything else (all writes and the HTML pages) is handled by the Flask app
+    await flask_asgi(scope, receive, send)
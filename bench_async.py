@@ -0,0 +1,149 @@
+# bench_async.py
+#
+# How many concurrent connections one process can serve: the async event
+# listing under uvicorn vs the same query on a threaded WSGI worker (gunicorn
+# gthread). Clients arrive evenly over --ramp seconds and trickle their request
+# headers in over --hold seconds, like slow mobile clients. A threaded worker
+# spends a thread on each such client; the ASGI server spends only a coroutine.
+#
+#   python bench_async.py [--connections 100 400 1000] [--threads 32] [--hold 2] [--ramp 5]
+#
+# Requires uvicorn and gunicorn on PATH. Seeds a scratch database of events.
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+if __name__ == '__main__' and 'DATABASE_URL' not in os.environ:
+    _scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+    os.environ['DATABASE_URL'] = f"sqlite:///{_scratch.name}"
+    os.environ['REPLICA_DATABASE_URL'] = f"sqlite:///{_scratch.name}.replica"
+
+from flask import jsonify, session  # noqa: E402
+
+from app import app, db, init_db, events_in_range, Club, Event  # noqa: E402
+
+PORT = 8765
+
+
+@app.route('/bench/events/upcoming')
+def bench_events_upcoming():
+    # Threaded baseline: the same query as /api/events/upcoming, on the sync stack
+    if 'user_id' not in session:
+        return jsonify(error='Login required.'), 401
+    now = datetime.now()
+    events = events_in_range(now, now + timedelta(days=7))
+    return jsonify(days=7, events=[{
+        'event_id': e.event_id, 'series_id': e.series_id, 'club_id': e.club_id, 'club_name': e.club.name,
+        'title': e.title, 'date_time': e.date_time.isoformat(), 'location': e.location,
+        'description': e.description, 'registration_link': e.registration_link,
+    } for e in events])
+
+
+sync_app = app
+
+
+def seed(events):
+    with app.app_context():
+        init_db.callback.__wrapped__()
+        club = Club.query.first()
+        now = datetime.now()
+        db.session.add_all(
+            Event(club_id=club.club_id, title=f"Event {i}", date_time=now + timedelta(hours=i - events // 2))
+            for i in range(events)
+        )
+        db.session.commit()
+
+
+def session_cookie():
+    with app.test_request_context():
+        serializer = app.session_interface.get_signing_serializer(app)
+        return serializer.dumps({'user_id': 3, 'role': 'Student'})
+
+
+async def slow_client(path, cookie, delay, hold, timeout):
+    await asyncio.sleep(delay)
+    start = time.perf_counter()
+    lines = [f"GET {path} HTTP/1.1", "Host: localhost", "Accept: application/json",
+             f"Cookie: session={cookie}", "Connection: close", ""]
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', PORT), timeout)
+        for line in lines:
+            writer.write(f"{line}\r\n".encode())
+            await writer.drain()
+            if line:
+                await asyncio.sleep(hold / (len(lines) - 1))
+        response = await asyncio.wait_for(reader.read(), timeout)
+        writer.close()
+        return response.startswith(b'HTTP/1.1 200'), time.perf_counter() - start
+    except (OSError, asyncio.TimeoutError):
+        return False, time.perf_counter() - start
+
+
+async def load(path, connections, ramp, hold, timeout):
+    cookie = session_cookie()
+    results = await asyncio.gather(*(
+        slow_client(path, cookie, ramp * i / connections, hold, timeout) for i in range(connections)
+    ))
+    latencies = sorted(latency for ok, latency in results if ok)
+    return len(latencies), latencies[len(latencies) // 2] if latencies else 0, max(latencies, default=0)
+
+
+def wait_for_port():
+    import socket
+    for _ in range(100):
+        try:
+            socket.create_connection(('127.0.0.1', PORT), timeout=0.1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("Server did not start.")
+
+
+def bench(name, command, path, args):
+    server = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port()
+        for connections in args.connections:
+            served, p50, worst = asyncio.run(load(path, connections, args.ramp, args.hold, args.timeout))
+            print(f"{name:<22} {connections:>6} {served:>7} {p50:>8.2f}s {worst:>8.2f}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent slow clients served: ASGI vs threaded WSGI.')
+    parser.add_argument('--connections', type=int, nargs='+', default=[100, 400, 1000])
+    parser.add_argument('--threads', type=int, default=32, help='threads in the WSGI baseline worker')
+    parser.add_argument('--hold', type=float, default=2, help='seconds each client takes to send its request')
+    parser.add_argument('--ramp', type=float, default=5, help='seconds over which clients arrive')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds before a client gives up')
+    parser.add_argument('--events', type=int, default=500)
+    args = parser.parse_args()
+
+    seed(args.events)
+    bind = f"127.0.0.1:{PORT}"
+    print(f"{'server':<22} {'conns':>6} {'served':>7} {'p50':>9} {'max':>9}")
+    try:
+        bench(f"gunicorn gthread x{args.threads}", [
+            sys.executable, '-m', 'gunicorn', '-w', '1', '-k', 'gthread', '--threads', str(args.threads),
+            '--backlog', '2048', '-b', bind, 'bench_async:sync_app'
+        ], '/bench/events/upcoming', args)
+        bench('uvicorn (async)', [
+            sys.executable, '-m', 'uvicorn', '--host', '127.0.0.1', '--port', str(PORT),
+            '--backlog', '2048', '--log-level', 'warning', 'async_app:asgi_app'
+        ], '/api/events/upcoming', args)
+    finally:
+        if '_scratch' in globals():
+            os.remove(_scratch.name)
+            os.remove(_scratch.name + '.replica')
+
+
+if __name__ == '__main__':
+    main()
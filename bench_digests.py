@@ -0,0 +1,67 @@
+# bench_digests.py
+#
+# Notification rows written for a busy club, immediate vs digest delivery.
+# Seeds the init-db dataset into a scratch database, makes every student a
+# member of the club, replays a stream of club changes, and counts rows.
+#
+#   python bench_digests.py [--changes 200] [--minutes-between 5] [--flush-every 5]
+
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+
+_scratch = tempfile.NamedTemporaryFile(suffix='.db', delete=False)
+os.environ['DATABASE_URL'] = f"sqlite:///{_scratch.name}"
+os.environ['REPLICA_DATABASE_URL'] = f"sqlite:///{_scratch.name}.replica"
+
+from app import app, db, init_db, notify_club_members, flush_digests, User, Club, Enrollment, Notification  # noqa: E402
+
+
+def run(mode, changes, minutes_between, flush_every):
+    init_db.callback.__wrapped__()
+    club = Club.query.first()
+    User.query.update({User.notification_mode: mode})
+    Enrollment.query.delete()
+    db.session.add_all(
+        Enrollment(student_id=user.user_id, club_id=club.club_id, status='Member')
+        for user in User.query.filter_by(role='Student')
+    )
+    db.session.commit()
+    members = Enrollment.query.count()
+
+    now = datetime(2025, 1, 1, 9, 0)
+    for i in range(changes):
+        notify_club_members(club, f"Change #{i}", now=now)
+        db.session.commit()
+        if (i + 1) % flush_every == 0:
+            flush_digests(now=now)
+        now += timedelta(minutes=minutes_between)
+    flush_digests(now=now + timedelta(days=1))
+
+    return members, Notification.query.count()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Notification rows written: immediate vs digest.')
+    parser.add_argument('--changes', type=int, default=200)
+    parser.add_argument('--minutes-between', type=float, default=5)
+    parser.add_argument('--flush-every', type=int, default=5, help='run the flush job every N changes')
+    args = parser.parse_args()
+
+    try:
+        with app.app_context():
+            _, immediate_rows = run('immediate', args.changes, args.minutes_between, args.flush_every)
+            members, digest_rows = run('digest', args.changes, args.minutes_between, args.flush_every)
+    finally:
+        os.remove(_scratch.name)
+        os.remove(_scratch.name + '.replica')
+
+    window = app.config['DIGEST_WINDOW_MINUTES']
+    print(f"{members} members, {args.changes} changes, {args.minutes_between} min apart, {window} min digest window")
+    print(f"immediate: {immediate_rows} rows")
+    print(f"digest:    {digest_rows} rows ({1 - digest_rows / immediate_rows:.1%} fewer)")
+
+
+if __name__ == '__main__':
+    main()
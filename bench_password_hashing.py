@@ -0,0 +1,65 @@
+# bench_password_hashing.py
+#
+# Sustained logins per second at each password hashing cost setting.
+# Simulates N request workers all verifying passwords through one
+# PasswordHasher pool, the same way login() does.
+#
+#   python bench_password_hashing.py [--seconds 5] [--clients 16] [--workers 2]
+
+import argparse
+import threading
+import time
+
+from passwords import PasswordHasher, HasherBusy
+
+COSTS = {
+    'scrypt': [2 ** 12, 2 ** 13, 2 ** 14, 2 ** 15],
+    'pbkdf2_sha256': [100000, 300000, 600000],
+}
+
+
+def run(scheme, cost, seconds, clients, workers, use_processes):
+    hasher = PasswordHasher(scheme=scheme, cost=cost, workers=workers, use_processes=use_processes)
+    stored = hasher.hash('correct horse')
+    counts = {'ok': 0, 'busy': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        while time.perf_counter() < deadline:
+            try:
+                hasher.verify(stored, 'correct horse')
+                outcome = 'ok'
+            except HasherBusy:
+                outcome = 'busy'
+            with lock:
+                counts[outcome] += 1
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    hasher.shutdown()
+    return counts['ok'] / elapsed, counts['busy']
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sustained logins per second at each hashing cost.')
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--clients', type=int, default=16, help='concurrent request workers')
+    parser.add_argument('--workers', type=int, default=2, help='hashing pool size')
+    parser.add_argument('--processes', action='store_true', help='use a process pool')
+    args = parser.parse_args()
+
+    print(f"{'scheme':<15} {'cost':>8} {'logins/s':>10} {'shed':>6}")
+    for scheme, costs in COSTS.items():
+        for cost in costs:
+            rate, shed = run(scheme, cost, args.seconds, args.clients, args.workers, args.processes)
+            print(f"{scheme:<15} {cost:>8} {rate:>10.1f} {shed:>6}")
+
+
+if __name__ == '__main__':
+    main()
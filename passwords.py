@@ -0,0 +1,111 @@
+# passwords.py
+#
+# Password hashing for app.py. Hashes are slow on purpose (scrypt or PBKDF2),
+# so they run on a small bounded pool instead of inside the request worker,
+# and a login burst queues there rather than stalling every worker.
+#
+# Stored format:  <scheme>$<cost>$<salt>$<hash>   (salt and hash are base64)
+
+import base64
+import hashlib
+import hmac
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+SCHEMES = ('scrypt', 'pbkdf2_sha256')
+DEFAULT_COSTS = {'scrypt': 2 ** 14, 'pbkdf2_sha256': 600000}
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+
+class HasherBusy(Exception):
+    """Raised when the hashing queue is full; the caller should shed the request."""
+
+
+def _b64(raw):
+    return base64.b64encode(raw).decode('ascii')
+
+
+def _derive(scheme, cost, password, salt):
+    if scheme == 'scrypt':
+        return hashlib.scrypt(
+            password.encode('utf-8'), salt=salt, n=cost, r=SCRYPT_R, p=SCRYPT_P,
+            maxmem=256 * SCRYPT_R * cost
+        )
+    return hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt, cost)
+
+
+def hash_password(password, scheme='scrypt', cost=None):
+    """Returns a new salted hash string for the password."""
+    cost = cost or DEFAULT_COSTS[scheme]
+    salt = os.urandom(16)
+    return f"{scheme}${cost}${_b64(salt)}${_b64(_derive(scheme, cost, password, salt))}"
+
+
+def parse_hash(stored):
+    """Returns (scheme, cost, salt, digest), or None for a legacy plaintext value."""
+    parts = stored.split('$')
+    if len(parts) != 4 or parts[0] not in SCHEMES or not parts[1].isdigit():
+        return None
+    try:
+        return parts[0], int(parts[1]), base64.b64decode(parts[2]), base64.b64decode(parts[3])
+    except ValueError:
+        return None
+
+
+def verify_password(stored, password):
+    """Checks a password against a stored value (hashed or legacy plaintext)."""
+    parsed = parse_hash(stored)
+    if parsed is None:
+        return hmac.compare_digest(stored.encode('utf-8'), password.encode('utf-8'))
+    scheme, cost, salt, digest = parsed
+    return hmac.compare_digest(_derive(scheme, cost, password, salt), digest)
+
+
+class PasswordHasher:
+    """Runs hashing and verification on a bounded worker pool.
+
+    `cost` is the scrypt N parameter or the PBKDF2 iteration count. At most
+    `workers` hashes run at once; at most `max_pending` more may wait, after
+    which HasherBusy is raised instead of queueing indefinitely.
+    """
+
+    def __init__(self, scheme='scrypt', cost=None, workers=2, max_pending=32, use_processes=False):
+        if scheme not in SCHEMES:
+            raise ValueError(f"Unknown password hash scheme '{scheme}'.")
+        self.scheme = scheme
+        self.cost = cost or DEFAULT_COSTS[scheme]
+        executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=workers)
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._dummy_hash = None
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            return self._executor.submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password):
+        return self._run(hash_password, password, self.scheme, self.cost)
+
+    def verify(self, stored, password):
+        return self._run(verify_password, stored, password)
+
+    @property
+    def dummy_hash(self):
+        """A hash at the current setting to verify against when the user doesn't exist."""
+        if self._dummy_hash is None:
+            self._dummy_hash = hash_password(os.urandom(16).hex(), self.scheme, self.cost)
+        return self._dummy_hash
+
+    def needs_rehash(self, stored):
+        """True for plaintext, a different scheme, or a lower cost than configured."""
+        parsed = parse_hash(stored)
+        return parsed is None or parsed[0] != self.scheme or parsed[1] < self.cost
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,142 @@
+# photos.py
+#
+# Club photo storage for app.py. Uploaded originals are stored under their
+# content hash, and resized WebP variants are generated in the background:
+#
+#   <hash>.<ext>                          original, as uploaded
+#   <hash>-<width>w-<variant hash>.webp   variant, at most <width> pixels wide
+#   <hash>.variants.json                  manifest of the variants that are ready
+#
+# Every name includes a hash of the file's own bytes, so changing the encoder
+# or its settings produces new names. That is why the files can be served with
+# immutable cache headers. Pillow is optional; without it, only the original
+# is served.
+
+import hashlib
+import io
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow is optional
+    Image = None
+
+ALLOWED_EXTENSIONS = {'jpg', 'jpeg', 'png', 'gif', 'webp'}
+WEBP_QUALITY = 80
+
+MANIFEST_RECHECK_SECONDS = 30  # How often a photo without a manifest is looked for again
+
+log = logging.getLogger(__name__)
+_variant_executor = ThreadPoolExecutor(max_workers=1)
+_manifests = {}  # photo_file -> (checked_at, {width: variant filename}), so renders don't touch the disk
+_manifests_lock = threading.Lock()
+
+
+def _stem(photo_file):
+    return photo_file.rsplit('.', 1)[0]
+
+
+def _write_atomically(path, data):
+    # Write under a temporary name so a half-written file is never served
+    with open(path + '.tmp', 'wb') as f:
+        f.write(data)
+    os.replace(path + '.tmp', path)
+
+
+def save_original(file_storage, folder):
+    """Stores an uploaded file under its content hash and returns the stored filename."""
+    extension = file_storage.filename.rsplit('.', 1)[-1].lower() if '.' in file_storage.filename else ''
+    if extension not in ALLOWED_EXTENSIONS:
+        raise ValueError(f"Unsupported image type. Allowed: {', '.join(sorted(ALLOWED_EXTENSIONS))}.")
+
+    data = file_storage.read()
+    if Image is not None:
+        # Check the bytes really are an image; a renamed file would otherwise be stored and served
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                image.verify()
+        except Exception:
+            raise ValueError("Uploaded file is not a valid image.")
+    photo_file = f"{hashlib.sha256(data).hexdigest()[:20]}.{extension}"
+    path = os.path.join(folder, photo_file)
+
+    os.makedirs(folder, exist_ok=True)
+    if not os.path.exists(path):
+        _write_atomically(path, data)
+    return photo_file
+
+
+def generate_variants(photo_file, folder, widths):
+    """Writes a resized, re-encoded WebP variant for every width missing from the manifest."""
+    if Image is None:
+        log.warning("Pillow is not installed; serving %s without resized variants.", photo_file)
+        return
+
+    variants = dict(read_manifest(photo_file, folder))
+    with Image.open(os.path.join(folder, photo_file)) as source:
+        image = ImageOps.exif_transpose(source)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() else 'RGB')
+
+        for width in sorted(widths):
+            if width in variants:
+                continue
+            variant = image.copy()
+            variant.thumbnail((width, width * 4))
+            buffer = io.BytesIO()
+            variant.save(buffer, 'WEBP', quality=WEBP_QUALITY, method=6)
+            data = buffer.getvalue()
+
+            filename = f"{_stem(photo_file)}-{width}w-{hashlib.sha256(data).hexdigest()[:12]}.webp"
+            _write_atomically(os.path.join(folder, filename), data)
+            variants[width] = filename
+
+    # The manifest is written last, so it only ever lists files that exist
+    _write_atomically(
+        os.path.join(folder, f"{_stem(photo_file)}.variants.json"),
+        json.dumps({str(width): name for width, name in variants.items()}).encode('utf-8')
+    )
+    with _manifests_lock:
+        _manifests[photo_file] = (time.monotonic(), variants)
+
+
+def read_manifest(photo_file, folder):
+    """Returns {width: filename} for the variants that are ready, cached in memory."""
+    with _manifests_lock:
+        cached = _manifests.get(photo_file)
+    now = time.monotonic()
+    if cached and (cached[1] or now - cached[0] < MANIFEST_RECHECK_SECONDS):
+        return cached[1]
+
+    try:
+        with open(os.path.join(folder, f"{_stem(photo_file)}.variants.json")) as f:
+            variants = {int(width): name for width, name in json.load(f).items()}
+    except (OSError, ValueError):
+        variants = {}
+    with _manifests_lock:
+        _manifests[photo_file] = (now, variants)
+    return variants
+
+
+def schedule_variants(photo_file, folder, widths):
+    """Generates variants on the background worker so the upload request returns immediately."""
+    def run():
+        try:
+            generate_variants(photo_file, folder, widths)
+        except Exception:
+            log.exception("Could not generate variants for %s", photo_file)
+    return _variant_executor.submit(run)
+
+
+def pick_variant(photo_file, folder, widths, min_width):
+    """Returns the smallest generated variant at least `min_width` wide, else the original."""
+    variants = read_manifest(photo_file, folder)
+    for width in sorted(w for w in widths if w >= min_width):
+        if width in variants:
+            return variants[width]
+    return photo_file
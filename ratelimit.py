@@ -0,0 +1,204 @@
+# ratelimit.py
+#
+# In-process admission control for the write routes in app.py: token buckets
+# keyed per user / per IP, a global concurrency limiter, and counters for the
+# requests that were shed. Nothing in here depends on Flask.
+
+import math
+import sqlite3
+import threading
+import time
+from collections import Counter, OrderedDict
+
+
+def _refill(state, rate, burst, now):
+    tokens, updated = state
+    return min(burst, tokens + max(now - updated, 0) * rate)
+
+
+class MemoryBucketStore:
+    """Token buckets kept in this process's memory (one set per worker).
+
+    A bucket that has refilled to its burst is the same as no bucket, so those
+    are swept out; `max_keys` caps the store (least recently used first) so
+    attacker-chosen keys cannot grow it without bound.
+    """
+
+    def __init__(self, max_keys=100000, sweep_interval=60):
+        self._buckets = OrderedDict()  # key -> (tokens, updated, full_at)
+        self._lock = threading.Lock()
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._last_sweep = time.monotonic()
+
+    def take(self, buckets, now=None):
+        """Takes one token from every (key, rate, burst) bucket, or from none of them.
+
+        Returns (allowed, retry_after_seconds).
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            levels = [
+                _refill(self._buckets.get(key, (burst, now, now))[:2], rate, burst, now)
+                for key, rate, burst in buckets
+            ]
+            refused = [(1 - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets) if tokens < 1]
+            if refused:
+                return False, max(refused)
+
+            for tokens, (key, rate, burst) in zip(levels, buckets):
+                tokens -= 1
+                self._buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+                self._buckets.move_to_end(key)
+            self._evict(now)
+        return True, 0
+
+    def _evict(self, now):
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            for key in [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]:
+                del self._buckets[key]
+        while len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SQLiteBucketStore:
+    """Token buckets in a small SQLite file so several worker processes share one limit.
+
+    Full buckets are deleted periodically and the table is capped at `max_keys` rows.
+    """
+
+    def __init__(self, path, max_keys=100000, sweep_interval=60):
+        self.path = path
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._last_sweep = 0
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS token_bucket ('
+                'key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL, full_at REAL NOT NULL)'
+            )
+            conn.execute('CREATE INDEX IF NOT EXISTS ix_token_bucket_full_at ON token_bucket (full_at)')
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=OFF')
+            self._local.conn = conn
+        return conn
+
+    def take(self, buckets, now=None):
+        """Takes one token from every (key, rate, burst) bucket, or from none of them."""
+        # Wall clock rather than monotonic: the timestamps are compared across processes
+        now = time.time() if now is None else now
+        conn = self._connect()
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            levels = []
+            for key, rate, burst in buckets:
+                row = conn.execute('SELECT tokens, updated FROM token_bucket WHERE key = ?', (key,)).fetchone()
+                levels.append(_refill(row or (burst, now), rate, burst, now))
+            refused = [(1 - tokens) / rate for tokens, (_, rate, _) in zip(levels, buckets) if tokens < 1]
+
+            if not refused:
+                conn.executemany(
+                    'INSERT OR REPLACE INTO token_bucket (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)',
+                    [(key, tokens - 1, now, now + (burst - tokens + 1) / rate)
+                     for tokens, (key, rate, burst) in zip(levels, buckets)]
+                )
+                if now - self._last_sweep >= self.sweep_interval:
+                    self._last_sweep = now
+                    conn.execute('DELETE FROM token_bucket WHERE full_at <= ?', (now,))
+                    conn.execute(
+                        'DELETE FROM token_bucket WHERE key IN ('
+                        'SELECT key FROM token_bucket ORDER BY updated DESC LIMIT -1 OFFSET ?)',
+                        (self.max_keys,)
+                    )
+            conn.execute('COMMIT')
+        except Exception:
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            raise
+        return (False, max(refused)) if refused else (True, 0)
+
+
+class ConcurrencyLimiter:
+    """Caps the number of requests in flight; callers that don't get a slot are shed at once."""
+
+    def __init__(self, max_in_flight):
+        self.max_in_flight = max_in_flight
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+
+    def try_acquire(self):
+        return self._slots.acquire(blocking=False)
+
+    def release(self):
+        self._slots.release()
+
+
+class RateLimiter:
+    """Per-endpoint token-bucket limits plus a shared concurrency limiter.
+
+    `limits` maps an endpoint name to {'per_user': {...}, 'per_ip': {...}}, each
+    {'rate': tokens per second, 'burst': bucket size}. The 'default' entry applies
+    to endpoints without their own. IP limits should be much looser than user
+    limits, since many students share one campus NAT address.
+    """
+
+    def __init__(self, limits, store=None, max_in_flight=8, retry_after=1):
+        self.limits = limits
+        self.store = store or MemoryBucketStore()
+        self.concurrency = ConcurrencyLimiter(max_in_flight)
+        self.retry_after = retry_after
+        self.shed = Counter()
+        self.admitted = Counter()
+        self._counter_lock = threading.Lock()
+
+    def limit_for(self, endpoint):
+        return self.limits.get(endpoint) or self.limits.get('default')
+
+    def check(self, endpoint, user_key=None, ip_key=None):
+        """Takes a token from the user and IP buckets together.
+
+        Returns None if admitted, else seconds to wait. A refused request takes no tokens,
+        and so does one shed because a shared store stayed locked past its timeout.
+        """
+        limit = self.limit_for(endpoint)
+        if not limit:
+            return None
+        buckets = [
+            (f"{endpoint}:{scope}:{key}", limit[scope]['rate'], limit[scope]['burst'])
+            for scope, key in (('per_user', user_key), ('per_ip', ip_key))
+            if key is not None and scope in limit
+        ]
+        if not buckets:
+            return None
+        try:
+            allowed, retry_after = self.store.take(buckets)
+        except sqlite3.OperationalError:
+            self.record(endpoint, 'store_busy')
+            return self.retry_after
+        if not allowed:
+            self.record(endpoint, 'rate_limited')
+            return max(1, math.ceil(retry_after))
+        return None
+
+    def record(self, endpoint, outcome):
+        with self._counter_lock:
+            if outcome == 'admitted':
+                self.admitted[endpoint] += 1
+            else:
+                self.shed[(endpoint, outcome)] += 1
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                'admitted': dict(self.admitted),
+                'shed': {f"{endpoint}:{outcome}": count for (endpoint, outcome), count in self.shed.items()},
+            }